@@ -1,13 +1,56 @@
 import streamlit as st
 import pandas as pd
-import math
+import numpy as np
+import functools
 from datetime import date, timedelta
 
+# Numba is optional: when installed, the numeric core of the yield engine is
+# compiled to native code; otherwise it runs as plain Python.
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# --- MODEL CONSTANTS ---
+# Unit conversion (avoirdupois ounce/pound); multiply by the reciprocal instead of dividing
+GRAM_PER_OZ = 28.3495231
+GRAM_PER_LB = 16 * GRAM_PER_OZ
+OZ_PER_GRAM = 1.0 / GRAM_PER_OZ
+
+# Light Efficiency Coefficient (anything unlisted is treated as Blurple/CFL)
+LIGHT_EFF = {"High-End LED (Bar)": 1.0, "Budget LED (Quantum)": 0.85, "HPS/CMH": 0.70}
+# Medium Efficiency (Soil is the 1.0 base)
+MED_EFF = {"Aeroponics": 1.25, "DWC/Hydro": 1.20, "Coco Coir": 1.10}
+# Hydro roots are more efficient per gallon
+ROOT_EFF_HYDRO = {"DWC/Hydro", "Aeroponics"}
+# Per-plant yield ceiling (g); Auto has lower ceiling per plant than Photo
+PLANT_CEILING = {"Autoflower": 400.0}
+# Training Multiplier: 8% boost per training method, +5% bonus for Scrog.
+# Each method is a bit, so all 16 combinations are precomputed and indexed by mask.
+TRAIN_BITS = {"Topping": 1, "LST": 2, "Scrog (Net)": 4, "Mainlining": 8}
+TRAIN_MULT = [1.0 + bin(m).count("1") * 0.08 + (0.05 if m & 4 else 0.0) for m in range(16)]
+
+# Bottleneck chart labels, in the same order as the limits passed to _limit_df()
+_FACTOR_LABELS = ("Light Limit", "Space Limit", "Root/Plant Limit")
+
+# Setup recommender: sqft thresholds and the tent/light for each bracket.
+# TENTS/LIGHTS carry one extra entry for anything above the last threshold.
+THRESHOLDS = np.array([5, 10, 17, 26])
+TENTS = ("2x2.5 or 2x4 Tent", "3x3 or 2x4 Tent", "4x4 Tent", "5x5 Tent", "Multiple Tents or Dedicated Room")
+LIGHTS = ("200W-300W LED", "300W-480W LED", "600W-720W Bar LED", "800W-1000W Bar LED + CO2", "Multi-light Setup")
+
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Master Grow Logic", page_icon="🧪", layout="wide")
 
 # --- CUSTOM CSS FOR MOBILE ---
-st.markdown("""
+# Built once per process. The st.markdown call itself must stay on every rerun,
+# otherwise Streamlit drops the element (and the styling) from the page.
+@st.cache_resource
+def _css():
+    return """
     <style>
     .stApp { background-color: #0e1117; color: #d0d0d0; }
     .stMetric { background-color: #1f2937; padding: 10px; border-radius: 8px; border: 1px solid #374151; }
@@ -16,7 +59,8 @@ st.markdown("""
     .big-font { font-size: 20px !important; font-weight: bold; color: #10b981; }
     
     /* Mobile optimization for buttons */
-    div.stButton > button:first-child {
+    div.stButton > button:first-child,
+    div.stFormSubmitButton > button:first-child {
         width: 100%;
         border-radius: 12px;
         height: 3em;
@@ -26,7 +70,9 @@ st.markdown("""
         border: none;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_css(), unsafe_allow_html=True)
 
 # --- SIDEBAR: GLOBAL SETTINGS ---
 with st.sidebar:
@@ -41,7 +87,150 @@ with st.sidebar:
     GRAMS_PER_WATT_LED = st.number_input("Ref: Max LED Efficiency (g/w)", value=2.2)
     MAX_G_PER_SQFT = st.number_input("Ref: Max Density (g/sqft)", value=65.0)
 
+def _yield_core(true_watts, gpw, light_mult, sqft, max_g_sqft, pot_size, root_eff,
+                plant_ceiling, plant_count, grower_skill, train_mult, med_eff):
+    # --- LIMITING FACTOR CALCULATIONS ---
+    # Numeric core only: string selectors are mapped to floats by compute_yield().
+
+    # LIMIT A: LIGHT LIMIT (Photosynthetic Ceiling)
+    # light_mult is the light efficiency coefficient times the CO2 multiplier
+    limit_light_g = true_watts * gpw * light_mult
+
+    # LIMIT B: SPACE LIMIT (Canopy Saturation)
+    # You cannot physically fit infinite buds in a 4x4.
+    limit_space_g = sqft * max_g_sqft
+
+    # LIMIT C: ROOT/PLANT LIMIT (Biological Capacity)
+    # A single plant in a 1gal pot has a max biological output regardless of light/space.
+    # Calculate max yield based on pot size and plant count
+    # Formula: diminishing returns on pot size.
+    # Base 30g + (Gallons * 35g) * RootEff
+    per_plant_max = 30.0 + (pot_size * 35.0 * root_eff)
+    if per_plant_max > plant_ceiling: per_plant_max = plant_ceiling
+
+    limit_root_g = per_plant_max * plant_count
+
+    # --- FINAL CALCULATION ---
+    # The yield is determined by the LOWEST of the three limits (Liebig's Law)
+    bottleneck_val = min(limit_light_g, limit_space_g, limit_root_g)
+
+    # Apply Grower Skill and Training modifiers to the bottleneck, then the
+    # hard cap (cannot exceed theoretical max of the light source significantly)
+    predicted_yield_g = min(bottleneck_val * grower_skill * train_mult * med_eff, true_watts * 3.0)
+
+    return predicted_yield_g, limit_light_g, limit_space_g, limit_root_g, bottleneck_val
+
+# The script body runs on every rerun, so compile the kernel once per process and
+# warm it with a dummy call so the first real interaction doesn't pay the JIT cost.
+# cache_resource only hashes this wrapper's own source, so the caller passes a
+# fingerprint of _yield_core's bytecode and constants: editing the kernel (e.g. under
+# `streamlit run` hot reload) then compiles the new version instead of reusing the old.
+@st.cache_resource
+def _yield_kernel(core_fingerprint):
+    kernel = njit(cache=True, fastmath=True)(_yield_core)
+    kernel(480.0, 2.2, 1.0, 16.0, 65.0, 5.0, 1.0, 800.0, 4.0, 1.0, 1.0, 1.0)
+    return kernel
+
+# Every selectbox/checkbox/multiselect input has only a handful of values, so the
+# coefficients they map to are computed once per combination and reused. The cache is
+# recreated with the function on each script run, so edits to the tables above always
+# take effect; compute_yield's st.cache_data is what persists across reruns.
+@functools.lru_cache(maxsize=2048)
+def _discrete_coeffs(light_type, system_type, strain_type, training_key, co2):
+    # 1. Light Efficiency Coefficient
+    # CO2 releases the light ceiling. Without CO2, plants can only process so much light.
+    light_mult = LIGHT_EFF.get(light_type, 0.50) * (1.25 if co2 else 1.0)
+
+    # 2. Medium Efficiency
+    med_eff = MED_EFF.get(system_type, 1.0) # Soil base
+
+    # 3. Auto has lower ceiling per plant than Photo.
+    plant_ceiling = PLANT_CEILING.get(strain_type, 800.0)
+
+    # 4. Hydro roots are more efficient per gallon
+    root_eff = 1.5 if system_type in ROOT_EFF_HYDRO else 1.0
+
+    # 5. Training Multiplier (training_key is the TRAIN_BITS mask)
+    train_mult = TRAIN_MULT[training_key]
+
+    return light_mult, med_eff, plant_ceiling, root_eff, train_mult
+
+# --- LOGIC ENGINE (cached, pure) ---
+# Streamlit reruns the whole script on every widget change, so the pure math is
+# memoized on its inputs and only recomputed when the yield inputs actually change.
+@st.cache_data(max_entries=256)
+def compute_yield(length, width, system_type, true_watts, light_type, co2_supplement,
+                  plant_count, pot_size, strain_type, training_key, grower_skill,
+                  GRAMS_PER_WATT_LED, MAX_G_PER_SQFT):
+    light_mult, med_eff, plant_ceiling, root_eff, train_mult = _discrete_coeffs(
+        light_type, system_type, strain_type, training_key, co2_supplement)
+
+    predicted_yield_g, limit_light_g, limit_space_g, limit_root_g, bottleneck_val = _yield_kernel((_yield_core.__code__.co_code, _yield_core.__code__.co_consts))(
+        float(true_watts), float(GRAMS_PER_WATT_LED), light_mult,
+        float(length * width), float(MAX_G_PER_SQFT), float(pot_size), root_eff,
+        plant_ceiling, float(plant_count), float(grower_skill), train_mult, med_eff)
+
+    return {
+        "predicted": predicted_yield_g,
+        "limit_light_g": limit_light_g,
+        "limit_space_g": limit_space_g,
+        "limit_root_g": limit_root_g,
+        "bottleneck": bottleneck_val,
+    }
+
+@st.cache_data(max_entries=256)
+def compute_reverse(target_g):
+    # Logic Reversal
+    # Assume average efficiency (1.5 GPW) and average density (40g/sqft)
+    req_watts = target_g / 1.5
+    req_sqft = target_g / 40.0
+
+    # Tent Logic
+    # side="right" keeps the old strict '<' boundaries (exactly 5 sqft -> 3x3)
+    i = int(np.searchsorted(THRESHOLDS, req_sqft, side="right"))
+    tent_rec, light_rec = TENTS[i], LIGHTS[i]
+
+    est_pots = int(-(-target_g // 112)) # ceil via floor-div; ~4oz per plant avg assumption for counting
+
+    return {
+        "req_watts": req_watts,
+        "req_sqft": req_sqft,
+        "tent_rec": tent_rec,
+        "light_rec": light_rec,
+        "est_pots": est_pots,
+    }
+
+# Bottleneck chart data, reused across reruns while the three limits are unchanged
+@st.cache_data(max_entries=256)
+def _limit_df(limit_light_g, limit_space_g, limit_root_g):
+    return pd.DataFrame({
+        "Factor": _FACTOR_LABELS,
+        "Max Grams": np.array([limit_light_g, limit_space_g, limit_root_g], dtype=np.float32)
+    })
+
+# --- ENERGY DEFAULTS ---
+# Only the main light's wattage varies, so the default table is rebuilt only when it changes.
+# Built column-wise (one typed array per column) so pandas doesn't have to transpose rows.
+@st.cache_data
+def _default_devices_df(main_w):
+    # Default list
+    return pd.DataFrame({
+        "name": np.array(["Main Grow Light", "Inline Fan (Exhaust)", "Clip Fans", "Dehumidifier",
+                          "AC Unit", "Humidifier", "Heater"], dtype=object),
+        "watts": np.array([main_w, 60, 30, 400, 800, 50, 1000], dtype=np.int32),
+        "veg_duty": np.array([1.0, 0.5, 1.0, 0.1, 0.0, 0.5, 0.0], dtype=np.float32),
+        "flower_duty": np.array([1.0, 1.0, 1.0, 0.4, 0.0, 0.1, 0.0], dtype=np.float32), # Dehumidifier runs more in flower
+        "dry_duty": np.array([0.0, 0.5, 1.0, 0.3, 0.0, 0.0, 0.0], dtype=np.float32), # Light off during dry
+    })
+
 # --- TAB STRUCTURE ---
+# Each tab body is an st.fragment, so a widget change only reruns the tab it lives in.
+# Values shared between tabs travel through st.session_state.
+# True only while the tabs are drawn by a full script run (see the bottom of the file).
+# A fragment rerun calls the stored fragment function, which still reads this module's
+# globals from the last full run, so there it sees False once that run has finished.
+_full_script_run = False
+
 tab_yield, tab_power, tab_extract, tab_reverse = st.tabs([
     "🧪 Yield Simulator", "⚡ Precision Energy", "🍯 Hash & Rosin", "🎯 Reverse Engineer"
 ])
@@ -49,7 +238,8 @@ tab_yield, tab_power, tab_extract, tab_reverse = st.tabs([
 # ==========================================
 # TAB 1: YIELD SIMULATOR (LIEBIG'S LAW)
 # ==========================================
-with tab_yield:
+@st.fragment
+def _tab_yield():
     st.header("Yield Prediction Engine")
     
     col1, col2 = st.columns(2)
@@ -79,82 +269,45 @@ with tab_yield:
         training = st.multiselect("Training Methods", ["Topping", "LST", "Scrog (Net)", "Mainlining"])
 
     # --- THE LOGIC ENGINE ---
-    # 1. Light Efficiency Coefficient
-    if light_type == "High-End LED (Bar)": light_eff = 1.0
-    elif light_type == "Budget LED (Quantum)": light_eff = 0.85
-    elif light_type == "HPS/CMH": light_eff = 0.70
-    else: light_eff = 0.50
-
-    # 2. Medium Efficiency
-    if system_type == "Aeroponics": med_eff = 1.25
-    elif system_type == "DWC/Hydro": med_eff = 1.20
-    elif system_type == "Coco Coir": med_eff = 1.10
-    else: med_eff = 1.0 # Soil base
-    
-    # 3. Training Multiplier
-    train_mult = 1.0 + (len(training) * 0.08) # 8% boost per training method
-    if "Scrog (Net)" in training: train_mult += 0.05 # Bonus for Scrog
-    
-    # --- LIMITING FACTOR CALCULATIONS ---
-    
-    # LIMIT A: LIGHT LIMIT (Photosynthetic Ceiling)
-    # CO2 releases the light ceiling. Without CO2, plants can only process so much light.
-    co2_mult = 1.25 if co2_supplement else 1.0
-    limit_light_g = (true_watts * GRAMS_PER_WATT_LED * light_eff * co2_mult)
-    
-    # LIMIT B: SPACE LIMIT (Canopy Saturation)
-    # You cannot physically fit infinite buds in a 4x4.
-    limit_space_g = sq_ft * MAX_G_PER_SQFT
-    
-    # LIMIT C: ROOT/PLANT LIMIT (Biological Capacity)
-    # A single plant in a 1gal pot has a max biological output regardless of light/space.
-    # Auto has lower ceiling per plant than Photo.
-    plant_ceiling = 400 if strain_type == "Autoflower" else 800 
-    
-    # Hydro roots are more efficient per gallon
-    root_eff = 1.5 if system_type in ["DWC/Hydro", "Aeroponics"] else 1.0
-    
-    # Calculate max yield based on pot size and plant count
-    # Formula: diminishing returns on pot size.
-    # Base 30g + (Gallons * 35g) * RootEff
-    per_plant_max = (30 + (pot_size * 35 * root_eff)) 
-    if per_plant_max > plant_ceiling: per_plant_max = plant_ceiling
-    
-    limit_root_g = per_plant_max * plant_count
+    training_key = sum(TRAIN_BITS[t] for t in training)
+    result = compute_yield(length, width, system_type, true_watts, light_type, co2_supplement,
+                           plant_count, pot_size, strain_type, training_key,
+                           grower_skill, GRAMS_PER_WATT_LED, MAX_G_PER_SQFT)
+    predicted_yield_g = result["predicted"]
+    limit_light_g = result["limit_light_g"]
+    limit_space_g = result["limit_space_g"]
+    limit_root_g = result["limit_root_g"]
+    bottleneck_val = result["bottleneck"]
 
-    # --- FINAL CALCULATION ---
-    # The yield is determined by the LOWEST of the three limits (Liebig's Law)
-    bottleneck_val = min(limit_light_g, limit_space_g, limit_root_g)
-    
-    # Apply Grower Skill and Training modifiers to the bottleneck
-    predicted_yield_g = bottleneck_val * grower_skill * train_mult * med_eff
-    
-    # Hard cap logic (cannot exceed theoretical max of the light source significantly)
-    max_physics = true_watts * 3.0
-    if predicted_yield_g > max_physics: predicted_yield_g = max_physics
+    # Share results with Tabs 2-3. If a tab-1-only rerun changed them, rerun the
+    # whole app now (before drawing anything) so those tabs don't keep showing
+    # numbers from the old inputs and this tab isn't rendered twice.
+    shared = {"predicted_yield_g": predicted_yield_g, "true_watts": true_watts}
+    changed = any(st.session_state.get(k) != v for k, v in shared.items())
+    st.session_state.update(shared)
+    if changed and not _full_script_run:
+        st.rerun(scope="app")
 
     # --- DISPLAY RESULTS ---
     st.divider()
     
-    # Metric Cards
-    m1, m2 = st.columns(2)
-    m1.metric("Predicted Dry Weight", f"{predicted_yield_g:.0f} g", f"{(predicted_yield_g/28.35):.1f} oz")
-    m2.metric("Efficiency (GPW)", f"{(predicted_yield_g/true_watts):.2f} g/w")
-    
-    m3, m4 = st.columns(2)
-    m3.metric("Canopy Density", f"{(predicted_yield_g/sq_ft):.1f} g/sqft")
-    market_val = (predicted_yield_g/28.35)*150
-    m4.metric("Market Value (@ $150/oz)", f"{currency_symbol}{market_val:.0f}")
+    # Metric Cards (rendered as one container so they refresh together)
+    market_val = (predicted_yield_g * OZ_PER_GRAM)*150
+    metrics_ph = st.empty()
+    with metrics_ph.container():
+        m1, m2 = st.columns(2)
+        m1.metric("Predicted Dry Weight", f"{predicted_yield_g:.0f} g", f"{(predicted_yield_g * OZ_PER_GRAM):.1f} oz")
+        m2.metric("Efficiency (GPW)", f"{(predicted_yield_g/true_watts):.2f} g/w")
+        
+        m3, m4 = st.columns(2)
+        m3.metric("Canopy Density", f"{(predicted_yield_g/sq_ft):.1f} g/sqft")
+        m4.metric("Market Value (@ $150/oz)", f"{currency_symbol}{market_val:.0f}")
 
     # Bottleneck Analysis
     st.markdown("### 🔍 Bottleneck Analysis")
     st.caption("Your yield is limited by the lowest bar below (Liebig's Law). Increase that factor to improve yield.")
     
-    chart_data = pd.DataFrame({
-        "Factor": ["Light Limit", "Space Limit", "Root/Plant Limit"],
-        "Max Grams": [limit_light_g, limit_space_g, limit_root_g]
-    })
-    st.bar_chart(chart_data, x="Factor", y="Max Grams", color="#10b981")
+    st.bar_chart(_limit_df(limit_light_g, limit_space_g, limit_root_g), x="Factor", y="Max Grams", color="#10b981")
     
     if bottleneck_val == limit_light_g:
         st.warning("⚠️ **Limiting Factor: LIGHT.** You have enough space and plants, but not enough wattage.")
@@ -166,63 +319,60 @@ with tab_yield:
 # ==========================================
 # TAB 2: PRECISION ENERGY
 # ==========================================
-with tab_power:
-    st.header("Electricity Cost Calculator")
-    
-    st.write("Defining Cycle Duration:")
-    c1, c2, c3 = st.columns(3)
-    days_veg = c1.number_input("Days in Veg (18/6)", value=35)
-    days_flower = c2.number_input("Days in Flower (12/12)", value=63)
-    days_dry = c3.number_input("Days Drying/Curing (24/7 env)", value=14)
-    
-    st.subheader("Equipment Loadout")
-    
-    # Helper function for adding devices
-    def add_device(name, watts, duty_veg, duty_flower, duty_dry):
-        return {"name": name, "watts": watts, "veg_duty": duty_veg, "flower_duty": duty_flower, "dry_duty": duty_dry}
+@st.fragment
+def _tab_power():
+    true_watts = st.session_state["true_watts"]
+    predicted_yield_g = st.session_state["predicted_yield_g"]
 
-    # Default list
-    default_devices = [
-        add_device("Main Grow Light", true_watts, 1.0, 1.0, 0.0), # Light off during dry
-        add_device("Inline Fan (Exhaust)", 60, 0.5, 1.0, 0.5),
-        add_device("Clip Fans", 30, 1.0, 1.0, 1.0),
-        add_device("Dehumidifier", 400, 0.1, 0.4, 0.3), # Runs more in flower
-        add_device("AC Unit", 800, 0.0, 0.0, 0.0),
-        add_device("Humidifier", 50, 0.5, 0.1, 0.0),
-        add_device("Heater", 1000, 0.0, 0.0, 0.0)
-    ]
-    
-    # Data Editor for fine-tuning
-    df_devices = pd.DataFrame(default_devices)
-    st.caption("Edit Watts and Duty Cycles (0.5 = 50% uptime). Set Duty to 0 if you don't use it.")
-    edited_df = st.data_editor(df_devices, num_rows="dynamic")
+    st.header("Electricity Cost Calculator")
     
-    if st.button("Calculate Energy Bill"):
-        total_kwh = 0
-        phase_costs = {"Veg": 0, "Flower": 0, "Dry": 0}
+    # Inputs are batched in a form: edits don't rerun anything until submit
+    with st.form("energy_form"):
+        st.write("Defining Cycle Duration:")
+        c1, c2, c3 = st.columns(3)
+        days_veg = c1.number_input("Days in Veg (18/6)", value=35)
+        days_flower = c2.number_input("Days in Flower (12/12)", value=63)
+        days_dry = c3.number_input("Days Drying/Curing (24/7 env)", value=14)
         
-        # Calculate per device
-        for index, row in edited_df.iterrows():
-            w = row['watts']
-            
-            # Logic:
-            # For lights: Veg is 18h * duty. Flower is 12h * duty.
-            # For others: Veg is 24h * duty. Flower is 24h * duty.
-            
-            is_light = "Light" in row['name']
-            
-            veg_hours = 18 if is_light else 24
-            flow_hours = 12 if is_light else 24
-            dry_hours = 0 if is_light else 24
-            
-            kwh_veg = (w * veg_hours * row['veg_duty'] * days_veg) / 1000
-            kwh_flow = (w * flow_hours * row['flower_duty'] * days_flower) / 1000
-            kwh_dry = (w * dry_hours * row['dry_duty'] * days_dry) / 1000
-            
-            total_kwh += (kwh_veg + kwh_flow + kwh_dry)
-            phase_costs["Veg"] += kwh_veg * kwh_cost
-            phase_costs["Flower"] += kwh_flow * kwh_cost
-            phase_costs["Dry"] += kwh_dry * kwh_cost
+        st.subheader("Equipment Loadout")
+        
+        # Data Editor for fine-tuning
+        df_devices = _default_devices_df(true_watts)
+        st.caption("Edit Watts and Duty Cycles (0.5 = 50% uptime). Set Duty to 0 if you don't use it.")
+        edited_df = st.data_editor(df_devices, num_rows="dynamic")
+        
+        submitted = st.form_submit_button("Calculate Energy Bill")
+    
+    if submitted:
+        # Calculate all devices at once (column arrays instead of a per-row loop).
+        # float32 is plenty for values shown to the cent and halves the array width.
+        w = edited_df['watts'].to_numpy(dtype=np.float32)
+        vd = edited_df['veg_duty'].to_numpy(dtype=np.float32)
+        fd = edited_df['flower_duty'].to_numpy(dtype=np.float32)
+        dd = edited_df['dry_duty'].to_numpy(dtype=np.float32)
+        
+        # Logic:
+        # For lights: Veg is 18h * duty. Flower is 12h * duty.
+        # For others: Veg is 24h * duty. Flower is 24h * duty.
+        is_light = edited_df['name'].str.contains('Light', na=False).to_numpy()
+        
+        # kWh per watt of duty for each phase (hours * days / 1000), folded once
+        K_VEG_L = 18 * days_veg / 1000
+        K_FLOW_L = 12 * days_flower / 1000
+        K_VEG = 24 * days_veg / 1000
+        K_FLOW = 24 * days_flower / 1000
+        K_DRY = 24 * days_dry / 1000
+        
+        k_veg = np.where(is_light, K_VEG_L, K_VEG).astype(np.float32)
+        k_flow = np.where(is_light, K_FLOW_L, K_FLOW).astype(np.float32)
+        k_dry = np.where(is_light, 0.0, K_DRY).astype(np.float32) # Light off during dry
+        
+        kwh_veg = float((w * k_veg * vd).sum())
+        kwh_flow = float((w * k_flow * fd).sum())
+        kwh_dry = float((w * k_dry * dd).sum())
+        
+        total_kwh = kwh_veg + kwh_flow + kwh_dry
+        phase_costs = {"Veg": kwh_veg * kwh_cost, "Flower": kwh_flow * kwh_cost, "Dry": kwh_dry * kwh_cost}
             
         total_cost = total_kwh * kwh_cost
         
@@ -238,7 +388,10 @@ with tab_power:
 # ==========================================
 # TAB 3: HASH & ROSIN
 # ==========================================
-with tab_extract:
+@st.fragment
+def _tab_extract():
+    predicted_yield_g = st.session_state["predicted_yield_g"]
+
     st.header("Solventless Extraction")
     
     st.info("Input your harvest weight to see returns.")
@@ -249,9 +402,9 @@ with tab_extract:
     
     with col_in:
         # Default to the predicted yield from Tab 1
-        default_val = float(predicted_yield_g/28.35)
+        default_val = float(predicted_yield_g * OZ_PER_GRAM)
         input_amount_oz = st.number_input("Input Weight (oz)", value=default_val)
-        input_g = input_amount_oz * 28.35
+        input_g = input_amount_oz * GRAM_PER_OZ
         
     with col_calc:
         if input_type == "Dry Cured Flower":
@@ -277,7 +430,8 @@ with tab_extract:
 # ==========================================
 # TAB 4: REVERSE ENGINEER
 # ==========================================
-with tab_reverse:
+@st.fragment
+def _tab_reverse():
     st.header("Setup Recommender")
     st.write("Tell me what you want, I'll tell you what you need.")
     
@@ -285,16 +439,15 @@ with tab_reverse:
     target_val = st.number_input(f"Desired Yield ({target_unit})", value=1.0)
     
     # Convert to grams
-    if target_unit == "Ounces": target_g = target_val * 28.35
-    elif target_unit == "Pounds": target_g = target_val * 453.59
+    if target_unit == "Ounces": target_g = target_val * GRAM_PER_OZ
+    elif target_unit == "Pounds": target_g = target_val * GRAM_PER_LB
     else: target_g = target_val * 1000
     
     st.divider()
     
-    # Logic Reversal
-    # Assume average efficiency (1.5 GPW) and average density (40g/sqft)
-    req_watts = target_g / 1.5
-    req_sqft = target_g / 40.0
+    rev = compute_reverse(target_g)
+    req_watts = rev["req_watts"]
+    req_sqft = rev["req_sqft"]
     
     col_rec1, col_rec2 = st.columns(2)
     
@@ -306,25 +459,27 @@ with tab_reverse:
     with col_rec2:
         st.subheader("Configuration Suggestions")
         
-        # Tent Logic
-        if req_sqft < 5: 
-            tent_rec = "2x2.5 or 2x4 Tent"
-            light_rec = "200W-300W LED"
-        elif req_sqft < 10: 
-            tent_rec = "3x3 or 2x4 Tent"
-            light_rec = "300W-480W LED"
-        elif req_sqft < 17: 
-            tent_rec = "4x4 Tent"
-            light_rec = "600W-720W Bar LED"
-        elif req_sqft < 26: 
-            tent_rec = "5x5 Tent"
-            light_rec = "800W-1000W Bar LED + CO2"
-        else: 
-            tent_rec = "Multiple Tents or Dedicated Room"
-            light_rec = "Multi-light Setup"
+        tent_rec = rev["tent_rec"]
+        light_rec = rev["light_rec"]
             
         st.success(f"⛺ **Tent:** {tent_rec}")
         st.warning(f"💡 **Light:** {light_rec}")
         
-        est_pots = math.ceil(target_g / 112) # ~4oz per plant avg assumption for counting
+        est_pots = rev["est_pots"]
         st.info(f"🌱 **Plant Count:** {est_pots} plants in 5gal pots (Estimated)")
+
+# --- RENDER TABS ---
+# finally: an exception in any tab must not leave the flag stuck at True, or Tab 1
+# fragment reruns would stop refreshing Tabs 2-3.
+_full_script_run = True
+try:
+    with tab_yield:
+        _tab_yield()
+    with tab_power:
+        _tab_power()
+    with tab_extract:
+        _tab_extract()
+    with tab_reverse:
+        _tab_reverse()
+finally:
+    _full_script_run = False